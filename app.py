@@ -1,7 +1,15 @@
+import contextlib
+import hashlib
+import os
+import tempfile
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from kernels import fused_mask
+
 # =====================================================
 # CONFIGURAÇÃO DA PÁGINA
 # =====================================================
@@ -18,108 +26,159 @@ px.defaults.template = "plotly_dark"
 # ESTILO DARK EXECUTIVO
 # =====================================================
 
-st.markdown("""
-<style>
-
-/* Fundo principal */
-.main {
-    background: linear-gradient(90deg, #0f172a, #0b1120);
-}
-
-/* Títulos */
-h1, h2, h3 {
-    font-weight: 700;
-    color: #ffffff;
-}
-
-/* Subtítulos e textos */
-p, span {
-    color: #cbd5e1;
-}
+@st.cache_data
+def get_css():
+    with open(os.path.join(os.path.dirname(__file__), "style.css"), encoding="utf-8") as f:
+        return f.read()
 
-/* Cards das métricas */
-div[data-testid="metric-container"] {
-    background: #111827;
-    border: 1px solid #1f2937;
-    padding: 20px;
-    border-radius: 14px;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.4);
-}
+st.markdown(f"<style>{get_css()}</style>", unsafe_allow_html=True)
 
-/* Hover suave */
-div[data-testid="metric-container"]:hover {
-    transform: translateY(-4px);
-    transition: 0.3s ease;
-}
+# =====================================================
+# CARREGAMENTO DOS DADOS
+# =====================================================
 
-/* Label da métrica */
-div[data-testid="metric-container"] label {
-    color: #9ca3af;
-    font-size: 14px;
-}
+URL = "https://raw.githubusercontent.com/vqrca/dashboard_salarios_dados/refs/heads/main/dados-imersao-final.csv"
+
+USED_COLS = [
+    "ano",
+    "senioridade",
+    "contrato",
+    "tamanho_empresa",
+    "usd",
+    "cargo",
+    "remoto",
+    "residencia_iso3",
+]
 
-/* Valor da métrica */
-div[data-testid="metric-container"] div {
-    color: #ffffff;
-    font-size: 28px;
-    font-weight: 700;
+# float32 tem ~7 dígitos decimais de precisão, suficiente para médias salariais em USD
+DTYPES = {
+    "ano": "int16",
+    "usd": "float32",
+    "senioridade": "category",
+    "contrato": "category",
+    "tamanho_empresa": "category",
+    "cargo": "category",
+    "remoto": "category",
+    "residencia_iso3": "category",
 }
 
-</style>
-""", unsafe_allow_html=True)
-
-# =====================================================
-# CARREGAMENTO DOS DADOS
-# =====================================================
+# O hash do esquema no nome invalida o cache quando URL, colunas ou tipos mudam
+CACHE_KEY = hashlib.sha1(repr((URL, USED_COLS, sorted(DTYPES.items()))).encode()).hexdigest()[:12]
+CACHE_PATH = os.path.join(tempfile.gettempdir(), f"salarios-{CACHE_KEY}.parquet")
+
+def build_cache():
+    df = pd.read_csv(URL, usecols=USED_COLS, dtype=DTYPES, engine="pyarrow")
+
+    # Escreve em um arquivo temporário e renomeia, para nunca deixar um Parquet truncado
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(CACHE_PATH), suffix=".parquet.tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, CACHE_PATH)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+    return df
 
 @st.cache_data
 def load_data():
-    return pd.read_csv(
-        "https://raw.githubusercontent.com/vqrca/dashboard_salarios_dados/refs/heads/main/dados-imersao-final.csv"
-    )
-
-df = load_data()
+    if os.path.exists(CACHE_PATH):
+        try:
+            return pd.read_parquet(CACHE_PATH, columns=USED_COLS)
+        except (OSError, ValueError):
+            # Cache corrompido: descarta e reconstrói a partir do CSV
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(CACHE_PATH)
+    return build_cache()
 
 # =====================================================
 # SIDEBAR
 # =====================================================
 
+@st.cache_data
+def get_filter_options():
+    df = load_data()
+    return {
+        c: sorted(df[c].unique().tolist())
+        for c in ["ano", "senioridade", "contrato", "tamanho_empresa"]
+    }
+
+opts = get_filter_options()
+
 st.sidebar.header("🔎 Filtros")
 
 anos = st.sidebar.multiselect(
     "Ano",
-    sorted(df["ano"].unique()),
-    default=sorted(df["ano"].unique())
+    opts["ano"],
+    default=opts["ano"]
 )
 
 senioridades = st.sidebar.multiselect(
     "Senioridade",
-    sorted(df["senioridade"].unique()),
-    default=sorted(df["senioridade"].unique())
+    opts["senioridade"],
+    default=opts["senioridade"]
 )
 
 contratos = st.sidebar.multiselect(
     "Tipo de Contrato",
-    sorted(df["contrato"].unique()),
-    default=sorted(df["contrato"].unique())
+    opts["contrato"],
+    default=opts["contrato"]
 )
 
 tamanhos = st.sidebar.multiselect(
     "Tamanho da Empresa",
-    sorted(df["tamanho_empresa"].unique()),
-    default=sorted(df["tamanho_empresa"].unique())
+    opts["tamanho_empresa"],
+    default=opts["tamanho_empresa"]
 )
 
 # =====================================================
 # FILTRAGEM
 # =====================================================
 
-df_filtrado = df[
-    (df["ano"].isin(anos)) &
-    (df["senioridade"].isin(senioridades)) &
-    (df["contrato"].isin(contratos)) &
-    (df["tamanho_empresa"].isin(tamanhos))
-]
+def codes_and_lookup(col: pd.Series, selecionados: tuple):
+    # Converte a coluna em códigos inteiros e uma tabela booleana de códigos permitidos
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        # O False extra no final atende o código -1 (valor ausente)
+        allow = np.append(col.cat.categories.isin(selecionados), False)
+        return col.cat.codes.to_numpy(), allow
+    base = col.min()
+    allow = np.isin(np.arange(base, col.max() + 1), selecionados)
+    return (col - base).to_numpy(), allow
+
+# Cada combinação de filtros gera uma entrada; o limite evita que a memória cresça sem fim
+DATA_CACHE_ENTRIES = 32
+
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def filter_df(anos: tuple, senioridades: tuple, contratos: tuple, tamanhos: tuple) -> pd.DataFrame:
+    df = load_data()
+    opts = get_filter_options()
+
+    selecao = {
+        "ano": anos,
+        "senioridade": senioridades,
+        "contrato": contratos,
+        "tamanho_empresa": tamanhos,
+    }
+
+    # Com todas as opções selecionadas em todos os filtros, não há o que filtrar
+    if all(len(selecionados) == len(opts[c]) for c, selecionados in selecao.items()):
+        return df
+
+    (a, allow_a), (s, allow_s), (c, allow_c), (t, allow_t) = (
+        codes_and_lookup(df[col], selecionados) for col, selecionados in selecao.items()
+    )
+    mask = fused_mask(a, s, c, t, allow_a, allow_s, allow_c, allow_t)
+    return df.iloc[np.flatnonzero(mask)]
+
+filtros = (
+    tuple(sorted(anos)),
+    tuple(sorted(senioridades)),
+    tuple(sorted(contratos)),
+    tuple(sorted(tamanhos)),
+)
+
+df_filtrado = filter_df(*filtros)
 
 # =====================================================
 # TÍTULO
@@ -144,14 +203,18 @@ if df_filtrado.empty:
 
 st.subheader("📌 Métricas Gerais (Salário anual em USD)")
 
-salario_medio = df_filtrado["usd"].mean()
-salario_maximo = df_filtrado["usd"].max()
-total_registros = df_filtrado.shape[0]
-cargo_mais_frequente = (
-    df_filtrado["cargo"].mode().iloc[0]
-    if not df_filtrado["cargo"].mode().empty
-    else "-"
+stats = df_filtrado["usd"].agg(["mean", "max", "count"])
+salario_medio, salario_maximo, total_registros = (
+    stats["mean"],
+    stats["max"],
+    int(stats["count"]),
 )
+if len(df_filtrado):
+    contagem = df_filtrado["cargo"].value_counts()
+    # Empates são resolvidos pelo nome do cargo, como fazia mode()
+    cargo_mais_frequente = min(contagem.index[contagem == contagem.max()])
+else:
+    cargo_mais_frequente = "-"
 
 col1, col2, col3, col4 = st.columns(4)
 
@@ -168,13 +231,36 @@ st.divider()
 
 st.subheader("🧠 Principais Insights")
 
-top_cargos = (
-    df_filtrado.groupby("cargo")["usd"]
-    .mean()
-    .nlargest(10)
-    .sort_values()
-    .reset_index()
-)
+# O DataFrame filtrado vem como argumento não hasheado (prefixo _); a chave do
+# cache são as tuplas de filtros, que o determinam por completo
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def compute_top_cargos(_df_filtrado: pd.DataFrame, filtros: tuple) -> pd.DataFrame:
+    media = (
+        _df_filtrado.groupby("cargo", observed=True)["usd"]
+        .mean()
+        .nlargest(10)
+    )
+    return pd.DataFrame(
+        {"cargo": media.index.to_numpy(), "usd": media.to_numpy()}
+    ).sort_values("usd")
+
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def ds_by_country(_df_filtrado: pd.DataFrame, filtros: tuple) -> pd.DataFrame:
+    df_ds = _df_filtrado[_df_filtrado["cargo"] == "Data Scientist"]
+    media = df_ds.groupby("residencia_iso3", observed=True)["usd"].mean()
+    return pd.DataFrame(
+        {"residencia_iso3": media.index.to_numpy(), "usd": media.to_numpy()}
+    )
+
+@st.cache_data(max_entries=DATA_CACHE_ENTRIES)
+def remoto_counts(_df_filtrado: pd.DataFrame, filtros: tuple) -> pd.DataFrame:
+    vc = _df_filtrado["remoto"].value_counts()
+    vc = vc[vc > 0]
+    return pd.DataFrame(
+        {"tipo_trabalho": vc.index.to_numpy(), "quantidade": vc.to_numpy()}
+    )
+
+top_cargos = compute_top_cargos(df_filtrado, filtros)
 
 col1, col2 = st.columns(2)
 
@@ -204,65 +290,81 @@ st.divider()
 
 st.subheader("📈 Análises Visuais")
 
-col1, col2 = st.columns(2)
+# As figuras são compartilhadas entre sessões sem cópia (st.plotly_chart não as
+# altera); o limite evita que o cache cresça sem fim
+FIG_CACHE_ENTRIES = 64
 
-with col1:
-    fig_cargos = px.bar(
-        top_cargos,
+@st.cache_resource(max_entries=FIG_CACHE_ENTRIES)
+def make_fig_cargos(top_cargos_tuple: tuple):
+    fig = px.bar(
+        pd.DataFrame(top_cargos_tuple, columns=["cargo", "usd"]),
         x="usd",
         y="cargo",
         orientation="h",
         title="Top 10 Cargos por Salário Médio",
         labels={"usd": "Média Salarial (USD)", "cargo": ""}
     )
-    fig_cargos.update_layout(margin=dict(l=20, r=20, t=50, b=20))
-    st.plotly_chart(fig_cargos, use_container_width=True)
-
-with col2:
-    fig_hist = px.histogram(
-        df_filtrado,
-        x="usd",
-        nbins=30,
+    fig.update_layout(margin=dict(l=20, r=20, t=50, b=20))
+    return fig
+
+@st.cache_resource(max_entries=FIG_CACHE_ENTRIES)
+def make_fig_hist(centers: tuple, counts: tuple):
+    fig = px.bar(
+        x=centers,
+        y=counts,
         title="Distribuição Salarial",
-        labels={"usd": "Faixa Salarial (USD)"}
+        labels={"x": "Faixa Salarial (USD)", "y": "Contagem"}
     )
-    fig_hist.update_layout(margin=dict(l=20, r=20, t=50, b=20))
-    st.plotly_chart(fig_hist, use_container_width=True)
+    fig.update_layout(margin=dict(l=20, r=20, t=50, b=20), bargap=0)
+    return fig
 
-col3, col4 = st.columns(2)
-
-with col3:
-    remoto = (
-        df_filtrado["remoto"]
-        .value_counts()
-        .rename_axis("tipo_trabalho")
-        .reset_index(name="quantidade")
-    )
-
-    fig_remoto = px.pie(
-        remoto,
+@st.cache_resource(max_entries=FIG_CACHE_ENTRIES)
+def make_fig_remoto(remoto_tuple: tuple):
+    fig = px.pie(
+        pd.DataFrame(remoto_tuple, columns=["tipo_trabalho", "quantidade"]),
         names="tipo_trabalho",
         values="quantidade",
         hole=0.5,
         title="Tipos de Trabalho"
     )
-    fig_remoto.update_layout(margin=dict(l=20, r=20, t=50, b=20))
-    st.plotly_chart(fig_remoto, use_container_width=True)
+    fig.update_layout(margin=dict(l=20, r=20, t=50, b=20))
+    return fig
+
+@st.cache_resource(max_entries=FIG_CACHE_ENTRIES)
+def make_fig_paises(media_pais_tuple: tuple):
+    fig = px.choropleth(
+        pd.DataFrame(media_pais_tuple, columns=["residencia_iso3", "usd"]),
+        locations="residencia_iso3",
+        color="usd",
+        color_continuous_scale="Blues",
+        title="Salário Médio de Data Scientist por País"
+    )
+    fig.update_layout(margin=dict(l=20, r=20, t=50, b=20))
+    return fig
+
+fig_cargos = make_fig_cargos(tuple(top_cargos.itertuples(index=False, name=None)))
+st.plotly_chart(fig_cargos, use_container_width=True)
 
-with col4:
-    df_ds = df_filtrado[df_filtrado["cargo"] == "Data Scientist"]
+tab1, tab2, tab3 = st.tabs(["Distribuição", "Tipos de Trabalho", "Mapa DS"])
 
-    if not df_ds.empty:
-        media_pais = df_ds.groupby("residencia_iso3")["usd"].mean().reset_index()
+with tab1:
+    counts, edges = np.histogram(df_filtrado["usd"].to_numpy(), bins=30)
+    centers = (edges[:-1] + edges[1:]) / 2
 
-        fig_paises = px.choropleth(
-            media_pais,
-            locations="residencia_iso3",
-            color="usd",
-            color_continuous_scale="Blues",
-            title="Salário Médio de Data Scientist por País"
-        )
-        fig_paises.update_layout(margin=dict(l=20, r=20, t=50, b=20))
+    fig_hist = make_fig_hist(tuple(centers.tolist()), tuple(counts.tolist()))
+    st.plotly_chart(fig_hist, use_container_width=True)
+
+with tab2:
+    remoto = remoto_counts(df_filtrado, filtros)
+
+    fig_remoto = make_fig_remoto(tuple(remoto.itertuples(index=False, name=None)))
+    st.plotly_chart(fig_remoto, use_container_width=True)
+
+with tab3:
+    media_pais = ds_by_country(df_filtrado, filtros)
+
+    if not media_pais.empty:
+        fig_paises = make_fig_paises(tuple(media_pais.itertuples(index=False, name=None)))
         st.plotly_chart(fig_paises, use_container_width=True)
     else:
         st.info("Sem registros para Data Scientist.")
@@ -274,6 +376,15 @@ st.divider()
 # =====================================================
 
 st.subheader("📄 Dados Detalhados")
-st.dataframe(df_filtrado, use_container_width=True, height=400)
+PAGE_SIZE = 200
+total_paginas = max(1, -(-len(df_filtrado) // PAGE_SIZE))
+pagina = st.number_input("Página", min_value=1, max_value=total_paginas, value=1)
+
+inicio = (pagina - 1) * PAGE_SIZE
+st.dataframe(
+    df_filtrado.iloc[inicio:inicio + PAGE_SIZE],
+    use_container_width=True,
+    height=400
+)
 
 
@@ -0,0 +1,15 @@
+import numpy as np
+from numba import njit
+
+# Mantido fora de app.py: o Streamlit reexecuta o script a cada interação e
+# recriaria o dispatcher do Numba. Sem parallel=True, o kernel pode ser chamado
+# por várias sessões ao mesmo tempo sem depender de uma camada de threads segura;
+# o laço é limitado por memória, então o paralelismo pouco acrescentaria.
+
+@njit(cache=True)
+def fused_mask(a, s, c, t, allow_a, allow_s, allow_c, allow_t):
+    n = a.shape[0]
+    out = np.empty(n, np.bool_)
+    for i in range(n):
+        out[i] = allow_a[a[i]] & allow_s[s[i]] & allow_c[c[i]] & allow_t[t[i]]
+    return out